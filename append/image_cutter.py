@@ -14,10 +14,17 @@ python image_cutter.py -p .\nekonoba2025.bmp 560 730 1180
 
 import sys
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+import numpy as np
 from PIL import Image
 
 
+# NumPy配列との相互変換でモードが変わらない画像モード
+# （これ以外のモードはPILのcropで切り出す）
+ARRAY_SLICE_MODES = {'1', 'L', 'LA', 'P', 'RGB', 'RGBA', 'I', 'F'}
+
+
 def parse_arguments():
     """
     コマンドライン引数を解析する関数
@@ -101,6 +108,36 @@ def create_output_filename(original_path, start_y, end_y, index):
     return original_path.parent / output_name
 
 
+def crop_rows(img, pixels, start_y, end_y, image_width):
+    """
+    画像から指定したY範囲の行を切り出す関数
+    
+    Args:
+        img (Image.Image): 元画像（パレットや付加情報の引き継ぎに使用）
+        pixels (np.ndarray): 一度だけデコードした元画像のピクセル配列（Noneの場合はPILのcropを使用）
+        start_y (int): 切り出し開始Y座標
+        end_y (int): 切り出し終了Y座標
+        image_width (int): 画像の幅
+        
+    Returns:
+        Image.Image: 切り出した画像
+    """
+    if pixels is None:
+        # 画像を切り出し (left, top, right, bottom)
+        return img.crop((0, start_y, image_width, end_y))
+    
+    # 行方向のスライスはコピーを伴わないビューなので、保存時に一度だけ読み出される
+    cropped_img = Image.fromarray(pixels[start_y:end_y])
+    
+    # パレット画像はインデックス配列になるのでパレットを付け直す
+    if img.mode == 'P':
+        cropped_img.putpalette(img.palette.tobytes(), img.palette.mode)
+    
+    # 透明色やDPIなどの付加情報を引き継ぐ
+    cropped_img.info = img.info.copy()
+    return cropped_img
+
+
 def cut_image_sections(image_path, cut_positions, position_mode=False):
     """
     画像を指定した位置で切り出す主処理関数
@@ -122,25 +159,30 @@ def cut_image_sections(image_path, cut_positions, position_mode=False):
             image_width, image_height = img.size
             saved_files = []
             
+            # 画像を一度だけデコードしてNumPy配列として保持（各カットはこの配列のスライス）
+            # cropで切り出すモードの場合も、ここで全体をデコードしておく
+            img.load()
+            pixels = np.asarray(img) if img.mode in ARRAY_SLICE_MODES else None
+            
             # 切り出し位置を昇順でソート（重複も除去）
             unique_cuts = sorted(set(cut_positions))
             
             if position_mode:
                 print(f"絶対位置モード - 切り出し位置: {unique_cuts}")
-                return cut_by_absolute_positions(img, image_path, unique_cuts, image_width, image_height)
+                return cut_by_absolute_positions(img, pixels, image_path, unique_cuts, image_width, image_height)
             else:
                 print(f"高さモード - 切り出し高さ: {unique_cuts}")
-                return cut_by_heights(img, image_path, unique_cuts, image_width, image_height)
+                return cut_by_heights(img, pixels, image_path, unique_cuts, image_width, image_height)
             
     except Exception as e:
         raise RuntimeError(f"画像処理中にエラーが発生しました: {e}")
 
 
-def cut_by_heights(img, image_path, unique_cuts, image_width, image_height):
+def cut_by_heights(img, pixels, image_path, unique_cuts, image_width, image_height):
     """
     高さベースで画像を切り出す（元の動作）
     """
-    saved_files = []
+    sections = []
     start_y = 0  # 最初は画像の上端から開始
     
     for i, cut_height in enumerate(unique_cuts):
@@ -161,17 +203,14 @@ def cut_by_heights(img, image_path, unique_cuts, image_width, image_height):
             print(f"警告: 切り出し範囲が無効です start:{start_y}, end:{end_y}（スキップ）")
             continue
         
-        # 画像を切り出し (left, top, right, bottom)
-        cropped_img = img.crop((0, start_y, image_width, end_y))
+        # 画像を切り出し
+        cropped_img = crop_rows(img, pixels, start_y, end_y, image_width)
         
         # 出力ファイル名を生成
         output_path = create_output_filename(image_path, start_y, end_y, i)
         
-        # 切り出した画像を保存
-        cropped_img.save(output_path)
-        saved_files.append(output_path)
-        
-        print(f"保存しました: {output_path} (Y: {start_y}-{end_y}, 高さ: {end_y-start_y}px)")
+        # 保存はまとめて並列に行う
+        sections.append((cropped_img, output_path, start_y, end_y))
         
         # 次の切り出し開始位置を更新
         start_y = end_y
@@ -180,14 +219,14 @@ def cut_by_heights(img, image_path, unique_cuts, image_width, image_height):
         if start_y >= image_height:
             break
     
-    return saved_files
+    return save_sections(sections)
 
 
-def cut_by_absolute_positions(img, image_path, unique_cuts, image_width, image_height):
+def cut_by_absolute_positions(img, pixels, image_path, unique_cuts, image_width, image_height):
     """
     絶対位置ベースで画像を切り出す（新機能）
     """
-    saved_files = []
+    sections = []
     positions = [0] + unique_cuts  # 先頭に0を追加
     
     for i in range(len(positions) - 1):
@@ -206,20 +245,43 @@ def cut_by_absolute_positions(img, image_path, unique_cuts, image_width, image_h
         # 画像の範囲内にクリップ
         end_y = min(end_y, image_height)
         
-        # 画像を切り出し (left, top, right, bottom)
-        cropped_img = img.crop((0, start_y, image_width, end_y))
+        # 画像を切り出し
+        cropped_img = crop_rows(img, pixels, start_y, end_y, image_width)
         
         # 出力ファイル名を生成
         output_path = create_output_filename(image_path, start_y, end_y, i)
         
-        # 切り出した画像を保存
-        cropped_img.save(output_path)
-        saved_files.append(output_path)
+        # 保存はまとめて並列に行う
+        sections.append((cropped_img, output_path, start_y, end_y))
+    
+    return save_sections(sections)
+
+
+def save_sections(sections):
+    """
+    切り出した画像をまとめて保存する関数
+    
+    Args:
+        sections (list): (切り出した画像, 出力パス, 開始Y座標, 終了Y座標) のリスト
+        
+    Returns:
+        list: 保存されたファイルパスのリスト
+    """
+    saved_files = []
+    
+    # PNGなどのエンコードはPIL内部でGILを解放するため、スレッドで並列に保存する
+    with ThreadPoolExecutor() as executor:
+        futures = [executor.submit(cropped_img.save, output_path)
+                   for cropped_img, output_path, _, _ in sections]
         
-        print(f"保存しました: {output_path} (Y: {start_y}-{end_y}, 高さ: {end_y-start_y}px)")
+        # 切り出し順に完了を待つ（保存中のエラーはここで送出される）
+        for future, (_, output_path, start_y, end_y) in zip(futures, sections):
+            future.result()
+            saved_files.append(output_path)
+            
+            print(f"保存しました: {output_path} (Y: {start_y}-{end_y}, 高さ: {end_y-start_y}px)")
     
     return saved_files
-            
 
 
 def main():
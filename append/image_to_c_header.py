@@ -23,11 +23,22 @@ python image_to_c_header.py *.bmp -o inverted_data.h --invert
 
 import sys
 import argparse
-import re
 import glob
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import nullcontext
 from pathlib import Path
 from PIL import Image
-import math
+
+
+# 0x00〜0xFFの16進数表記（バイト毎のフォーマット処理を省くため事前に生成）
+HEX_BYTES = [f"0x{i:02X}" for i in range(256)]
+
+# C言語の変数名に使えないASCII文字を'_'に置き換えるstr.translate用テーブル
+VARIABLE_NAME_TABLE = {c: '_' for c in range(128) if not (chr(c).isalnum() or chr(c) == '_')}
+
+# 画像が複数あり、合計画素数がこれ以上の場合だけ複数プロセスで並列に変換する
+# 1画像の変換は約25ns/画素と速く、プロセスの起動（Windowsのspawnでは約0.2秒）の方が遅いため
+PARALLEL_MIN_PIXELS = 1 << 23
 
 
 def parse_arguments():
@@ -80,6 +91,7 @@ def expand_wildcards(image_patterns):
         
     Returns:
         list: 展開されたファイルパスのリスト
+              （globで見つかったファイルは存在確認済みのPath、直接指定されたパスは文字列のまま）
     """
     expanded_files = []
     
@@ -95,7 +107,7 @@ def expand_wildcards(image_patterns):
                 print(f"  📁 見つかったファイル: {len(matched_files)}個")
                 for file in sorted(matched_files):
                     print(f"    📄 {file}")
-                expanded_files.extend(sorted(matched_files))
+                    expanded_files.append(Path(file))
             else:
                 print(f"  ⚠️  該当するファイルが見つかりません: {pattern}")
         else:
@@ -132,8 +144,8 @@ def sanitize_variable_name(filename):
     # 拡張子を除去
     name = Path(filename).stem
     
-    # 英数字とアンダースコア以外を削除
-    name = re.sub(r'[^a-zA-Z0-9_]', '_', name)
+    # 英数字とアンダースコア以外を'_'に置き換え（非ASCII文字は一旦'?'にしてから変換）
+    name = name.encode('ascii', 'replace').decode('ascii').translate(VARIABLE_NAME_TABLE)
     
     # 先頭が数字の場合は'img_'を追加
     if name and name[0].isdigit():
@@ -157,6 +169,7 @@ def convert_image_to_1bit_array(image_path, threshold=128, invert=False):
         
     Returns:
         tuple: (width, height, byte_array)
+               byte_array は1行ごとにバイト境界で区切られたbytes（Pythonのint配列は作らない）
     """
     try:
         # 画像を開く
@@ -165,137 +178,141 @@ def convert_image_to_1bit_array(image_path, threshold=128, invert=False):
             gray_img = img.convert('L')
             width, height = gray_img.size
             
-            print(f"  📏 サイズ: {width}x{height} ピクセル")
-            
             # 2値化処理（閾値より大きい場合は白=255、小さい場合は黒=0）
-            binary_img = gray_img.point(lambda x: 255 if x > threshold else 0, mode='1')
-            
-            # ピクセルデータを取得
-            pixels = list(binary_img.getdata())
+            # 256段階の変換テーブルを渡し、PIL内部（C実装）でそのまま適用させる
+            lut = bytes(255 if i > threshold else 0 for i in range(256))
+            binary_img = gray_img.point(lut, mode='1')
             
             # 1ビット1ピクセル形式でパッキング
-            # 8ピクセルを1バイトにまとめる
-            byte_array = []
-            
-            for y in range(height):
-                for x in range(0, width, 8):  # 8ピクセルずつ処理
-                    byte_value = 0
-                    
-                    # 8ビット分のピクセルを処理
-                    for bit_pos in range(8):
-                        pixel_x = x + bit_pos
-                        
-                        if pixel_x < width:  # 画像の幅を超えない場合のみ
-                            pixel_index = y * width + pixel_x
-                            pixel_value = pixels[pixel_index]
-                            
-                            # 白=True, 黒=False（PILの'1'モードでは255=白, 0=黒）
-                            is_white = (pixel_value == 255)
-                            
-                            # 反転オプションが有効な場合
-                            if invert:
-                                bit_value = 1 if is_white else 0
-                            else:
-                                bit_value = 0 if is_white else 1  # 通常は黒=1
-                            
-                            # MSB側から設定（左のピクセルが上位ビット）
-                            if bit_value:
-                                byte_value |= (1 << (7 - bit_pos))
-                    
-                    byte_array.append(byte_value)
+            # PILの'1'モードはMSB側が左のピクセルで、各行はバイト境界まで0で埋められる
+            # rawモード"1"は白=1、"1;I"は黒=1として出力される（通常は黒=1）
+            byte_array = binary_img.tobytes("raw", "1" if invert else "1;I")
             
-            print(f"  📦 変換結果: {len(byte_array)} バイト ({len(byte_array)*8} ビット)")
             return width, height, byte_array
             
     except Exception as e:
         raise RuntimeError(f"画像変換中にエラーが発生しました: {e}")
 
 
-def generate_c_header_content(image_data_list, invert=False):
+def generate_c_header_content(output_file, image_data_list, invert=False):
     """
-    C言語ヘッダーファイルの内容を生成する関数
+    C言語ヘッダーファイルの内容を生成してファイルに書き出す関数
     
     Args:
+        output_file (TextIO): 書き込み先のファイルオブジェクト
         image_data_list (list): 画像データのリスト
         invert (bool): 反転モードかどうか
-        
-    Returns:
-        str: ヘッダーファイルの内容
     """
-    header_content = []
+    def write_line(line=""):
+        # 全体を文字列に溜め込まず、1行ずつそのまま書き出す
+        output_file.write(line)
+        output_file.write("\n")
     
     # ヘッダーガード開始
-    header_content.append("#ifndef IMAGE_DATA_H")
-    header_content.append("#define IMAGE_DATA_H")
-    header_content.append("")
-    header_content.append("#include <stdint.h>")
-    header_content.append("")
+    write_line("#ifndef IMAGE_DATA_H")
+    write_line("#define IMAGE_DATA_H")
+    write_line()
+    write_line("#include <stdint.h>")
+    write_line()
     
     # 色についての説明コメント
     bit_meaning = "1=白, 0=黒" if invert else "1=黒, 0=白"
-    header_content.append(f"// 1ビット1ピクセル形式のモノクロ画像データ")
-    header_content.append(f"// ビット値: {bit_meaning}")
-    header_content.append(f"// バイト内のビット順序: MSB（左のピクセル）→ LSB（右のピクセル）")
-    header_content.append("")
+    write_line(f"// 1ビット1ピクセル形式のモノクロ画像データ")
+    write_line(f"// ビット値: {bit_meaning}")
+    write_line(f"// バイト内のビット順序: MSB（左のピクセル）→ LSB（右のピクセル）")
+    write_line()
     
     # 各画像のデータを生成
     for image_info in image_data_list:
         var_name = image_info['var_name']
+        var_name_upper = image_info['var_name_upper']
         width = image_info['width']
         height = image_info['height']
         byte_array = image_info['byte_array']
         original_file = image_info['original_file']
         
         # 画像情報のコメント
-        header_content.append(f"// 画像: {original_file}")
-        header_content.append(f"// サイズ: {width}x{height} ピクセル")
-        header_content.append(f"// データサイズ: {len(byte_array)} バイト")
-        header_content.append("")
+        write_line(f"// 画像: {original_file}")
+        write_line(f"// サイズ: {width}x{height} ピクセル")
+        write_line(f"// データサイズ: {len(byte_array)} バイト")
+        write_line()
         
         # 幅と高さの定数定義
-        width_const = f"{var_name.upper()}_WIDTH"
-        height_const = f"{var_name.upper()}_HEIGHT"
+        width_const = f"{var_name_upper}_WIDTH"
+        height_const = f"{var_name_upper}_HEIGHT"
         
-        header_content.append(f"#define {width_const}  {width}")
-        header_content.append(f"#define {height_const} {height}")
-        header_content.append("")
+        write_line(f"#define {width_const}  {width}")
+        write_line(f"#define {height_const} {height}")
+        write_line()
         
         # 画像データ配列の定義
-        header_content.append(f"static const uint8_t {var_name}[] = {{")
+        write_line(f"static const uint8_t {var_name}[] = {{")
+        
+        # 1行あたりのバイト数（行コメント計算用）
+        bytes_per_row = (width + 7) // 8
         
         # バイトデータを16進数で整形出力（16バイトずつ改行）
         for i in range(0, len(byte_array), 16):
             line_bytes = byte_array[i:i+16]
-            hex_values = [f"0x{byte:02X}" for byte in line_bytes]
-            line = "    " + ", ".join(hex_values)
+            line = "    " + ", ".join(map(HEX_BYTES.__getitem__, line_bytes))
             
             # 最後の行でない場合はカンマを追加
             if i + 16 < len(byte_array):
                 line += ","
             
             # 行コメントを追加（何行目のデータか）
-            start_row = i // math.ceil(width / 8)
-            end_row = min(start_row + (16 // math.ceil(width / 8)), height - 1)
+            start_row = i // bytes_per_row
+            end_row = min(start_row + (16 // bytes_per_row), height - 1)
             if start_row == end_row:
                 line += f"  // Row {start_row}"
             else:
                 line += f"  // Rows {start_row}-{end_row}"
             
-            header_content.append(line)
+            write_line(line)
         
-        header_content.append("};")
-        header_content.append("")
+        write_line("};")
+        write_line()
     
     # 画像数の定数
     if len(image_data_list) > 1:
-        header_content.append(f"#define IMAGE_COUNT {len(image_data_list)}")
-        header_content.append("")
+        write_line(f"#define IMAGE_COUNT {len(image_data_list)}")
+        write_line()
     
     # ヘッダーガード終了
-    header_content.append("#endif // IMAGE_DATA_H")
-    header_content.append("")
+    write_line("#endif // IMAGE_DATA_H")
+
+
+def count_total_pixels(paths):
+    """
+    画像のヘッダーだけを読み込んで合計画素数を求める関数
     
-    return "\n".join(header_content)
+    Args:
+        paths (list): 画像ファイルのPathのリスト
+        
+    Returns:
+        int: 合計画素数（読み込めない画像は数えない）
+    """
+    total = 0
+    for path in paths:
+        try:
+            with Image.open(path) as img:
+                total += img.width * img.height
+        except OSError:
+            continue
+    return total
+
+
+def run_inline(func, *args):
+    """
+    関数をその場で実行し、結果を持つFutureを返す関数
+    （プロセスプールを使わない場合も同じ方法で結果を受け取るため）
+    """
+    future = Future()
+    try:
+        future.set_result(func(*args))
+    except Exception as e:
+        future.set_exception(e)
+    return future
 
 
 def process_images(image_paths, threshold=128, invert=False):
@@ -303,7 +320,7 @@ def process_images(image_paths, threshold=128, invert=False):
     複数の画像ファイルを処理する関数
     
     Args:
-        image_paths (list): 画像ファイルパスのリスト
+        image_paths (list): 画像ファイルパスのリスト（expand_wildcardsの戻り値）
         threshold (int): 2値化の閾値
         invert (bool): 白黒反転フラグ
         
@@ -312,46 +329,71 @@ def process_images(image_paths, threshold=128, invert=False):
     """
     image_data_list = []
     
+    # ファイルの存在確認（見つからない場合は変換しない）
+    # globで展開されたPathは存在確認済みなので、直接指定されたパスのみ確認する
+    targets = []
     for image_path in image_paths:
         path = Path(image_path)
-        
-        # ファイルの存在確認
-        if not path.exists():
-            print(f"⚠️  警告: ファイルが見つかりません: {image_path}")
-            continue
-        
-        print(f"🖼️  処理中: {image_path}")
-        
-        try:
-            # 画像を変換
-            width, height, byte_array = convert_image_to_1bit_array(
-                path, threshold, invert
-            )
-            
-            # 変数名を生成
-            var_name = sanitize_variable_name(path.name)
-            
-            # 重複チェック（同じ変数名がある場合は番号を追加）
-            original_var_name = var_name
-            counter = 1
-            existing_names = [item['var_name'] for item in image_data_list]
-            while var_name in existing_names:
-                var_name = f"{original_var_name}_{counter}"
-                counter += 1
+        exists = isinstance(image_path, Path) or path.exists()
+        targets.append((image_path, path, exists))
+    paths = [path for _, path, exists in targets if exists]
+    
+    # 各画像の変換は独立しているため、大きな画像が複数ある場合は複数プロセスで並列に実行する
+    executor = None
+    if len(paths) > 1 and count_total_pixels(paths) >= PARALLEL_MIN_PIXELS:
+        executor = ProcessPoolExecutor()
+    submit = executor.submit if executor else run_inline
+    
+    with executor or nullcontext():
+        jobs = []
+        for image_path, path, exists in targets:
+            if not exists:
+                jobs.append((image_path, path, None))
+                continue
             
-            image_data_list.append({
-                'var_name': var_name,
-                'width': width,
-                'height': height,
-                'byte_array': byte_array,
-                'original_file': path.name
-            })
+            future = submit(convert_image_to_1bit_array, path, threshold, invert)
+            jobs.append((image_path, path, future))
+        
+        # 結果は入力順に受け取り、変数名の重複チェックは順番に行う
+        for image_path, path, future in jobs:
+            if future is None:
+                print(f"⚠️  警告: ファイルが見つかりません: {image_path}")
+                continue
             
-            print(f"  ✅ 完了: 変数名 '{var_name}'")
+            print(f"🖼️  処理中: {image_path}")
             
-        except Exception as e:
-            print(f"  ❌ エラー: {e}")
-            continue
+            try:
+                # 画像の変換結果を取得
+                width, height, byte_array = future.result()
+                
+                print(f"  📏 サイズ: {width}x{height} ピクセル")
+                print(f"  📦 変換結果: {len(byte_array)} バイト ({len(byte_array)*8} ビット)")
+                
+                # 変数名を生成
+                var_name = sanitize_variable_name(path.name)
+                
+                # 重複チェック（同じ変数名がある場合は番号を追加）
+                original_var_name = var_name
+                counter = 1
+                existing_names = [item['var_name'] for item in image_data_list]
+                while var_name in existing_names:
+                    var_name = f"{original_var_name}_{counter}"
+                    counter += 1
+                
+                image_data_list.append({
+                    'var_name': var_name,
+                    'var_name_upper': var_name.upper(),
+                    'width': width,
+                    'height': height,
+                    'byte_array': byte_array,
+                    'original_file': path.name
+                })
+                
+                print(f"  ✅ 完了: 変数名 '{var_name}'")
+                
+            except Exception as e:
+                print(f"  ❌ エラー: {e}")
+                continue
     
     return image_data_list
 
@@ -399,11 +441,9 @@ def main():
         print("")
         print(f"📝 Cヘッダーファイルを生成中...")
         
-        # ヘッダーファイルの内容を生成
-        header_content = generate_c_header_content(image_data_list, args.invert)
-        
-        # ファイルに書き込み
-        output_path.write_text(header_content, encoding='utf-8')
+        # ヘッダーファイルの内容を生成しながらファイルに書き込み
+        with output_path.open('w', encoding='utf-8', buffering=1 << 20) as output_file:
+            generate_c_header_content(output_file, image_data_list, args.invert)
         
         # 結果を表示
         print("")
@@ -417,8 +457,8 @@ def main():
         
         print("\n📋 生成された変数:")
         for item in image_data_list:
-            width_const = f"{item['var_name'].upper()}_WIDTH"
-            height_const = f"{item['var_name'].upper()}_HEIGHT"
+            width_const = f"{item['var_name_upper']}_WIDTH"
+            height_const = f"{item['var_name_upper']}_HEIGHT"
             print(f"  🔤 {item['var_name']}[] ({item['width']}x{item['height']}, {len(item['byte_array'])}バイト)")
             print(f"     定数: {width_const}, {height_const}")
         print("=" * 60)
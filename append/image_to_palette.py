@@ -22,9 +22,141 @@ import argparse
 import os
 import json
 import re
-from typing import List, Tuple, Dict, Optional
-import colorsys
-import math
+from typing import List, Dict, Optional
+
+
+# numbaでコンパイルしたカーネル {元の関数: コンパイル済み関数 (numbaが無い場合はNone)}
+_NUMBA_KERNELS = {}
+
+
+def _jit(func):
+    """
+    func をnumbaでコンパイルした関数を返す（numbaが無い場合はNone）
+    numbaのインポートは重い（約0.25秒）ので、ディザリングで初めて必要になったときに読み込む
+    """
+    if func not in _NUMBA_KERNELS:
+        try:
+            from numba import njit
+        except ImportError:
+            _NUMBA_KERNELS[func] = None
+        else:
+            _NUMBA_KERNELS[func] = njit(cache=True)(func)
+    return _NUMBA_KERNELS[func]
+
+
+# 組み込みパレット（RGB888形式、インデックス0は透明色）
+PALETTES = {
+    "classic": (
+        (0, 0, 0),        # 0: 透明色（黒）
+        (255, 255, 255),  # 1: 白
+        (248, 0, 0),      # 2: 赤
+        (0, 248, 0),      # 3: 緑
+        (0, 0, 248),      # 4: 青
+        (248, 248, 0),    # 5: 黄
+        (248, 0, 248),    # 6: マゼンタ
+        (0, 248, 248),    # 7: シアン
+        (132, 132, 132),  # 8: グレー
+        (252, 100, 0),    # 9: オレンジ
+        (128, 0, 0),      # 10: ダークレッド
+        (0, 100, 0),      # 11: ダークグリーン
+        (0, 0, 128),      # 12: ダークブルー
+        (132, 100, 0),    # 13: ブラウン
+        (66, 66, 66),     # 14: ダークグレー
+        (33, 33, 33),     # 15: ベリーダーク
+    ),
+    "gameboy": (
+        (0, 0, 0),        # 0: 透明色
+        (155, 188, 15),   # 1: ライトグリーン
+        (139, 172, 15),   # 2: 
+        (123, 156, 15),   # 3:
+        (107, 140, 15),   # 4:
+        (91, 124, 15),    # 5:
+        (75, 108, 15),    # 6:
+        (59, 92, 15),     # 7:
+        (43, 76, 15),     # 8:
+        (27, 60, 15),     # 9:
+        (15, 56, 15),     # 10: ダークグリーン
+        (0, 40, 0),       # 11:
+        (0, 32, 0),       # 12:
+        (0, 24, 0),       # 13:
+        (0, 16, 0),       # 14:
+        (0, 8, 0),        # 15:
+    ),
+    "sepia": (
+        (0, 0, 0),        # 0: 透明色
+        (255, 255, 255),  # 1: セピア白
+        (240, 220, 180),  # 2:
+        (220, 200, 160),  # 3:
+        (200, 180, 140),  # 4:
+        (180, 160, 120),  # 5:
+        (160, 140, 100),  # 6:
+        (140, 120, 80),   # 7:
+        (120, 100, 60),   # 8:
+        (100, 80, 40),    # 9:
+        (80, 60, 20),     # 10:
+        (70, 50, 15),     # 11:
+        (60, 40, 10),     # 12:
+        (50, 30, 5),      # 13:
+        (40, 20, 0),      # 14:
+        (20, 10, 0),      # 15: セピア黒
+    ),
+    "neon": (
+        (0, 0, 0),        # 0: 透明色
+        (255, 255, 255),  # 1: 白
+        (255, 0, 255),    # 2: ネオンピンク
+        (0, 255, 255),    # 3: ネオンシアン
+        (255, 255, 0),    # 4: ネオンイエロー
+        (255, 128, 0),    # 5: ネオンオレンジ
+        (128, 255, 0),    # 6: ネオングリーン
+        (0, 255, 128),    # 7: 
+        (0, 128, 255),    # 8: ネオンブルー
+        (128, 0, 255),    # 9: ネオンパープル
+        (255, 0, 128),    # 10:
+        (192, 192, 192),  # 11: シルバー
+        (128, 128, 128),  # 12: グレー
+        (64, 64, 64),     # 13: ダークグレー
+        (32, 32, 32),     # 14:
+        (16, 16, 16),     # 15:
+    ),
+}
+
+# sRGB(リニア) → XYZ 変換行列
+SRGB_TO_XYZ = np.array([
+    [0.4124564, 0.3575761, 0.1804375],
+    [0.2126729, 0.7151522, 0.0721750],
+    [0.0193339, 0.1191920, 0.9503041],
+], dtype=np.float64)
+
+# D65 白色点
+D65_WHITE = np.array([0.95047, 1.00000, 1.08883], dtype=np.float64)
+
+# 最も近いパレット色を一度に計算する色数（距離計算の中間配列が大きくなりすぎないように）
+CLOSEST_CHUNK_COLORS = 1 << 16
+
+# この画素数以上の画像は、含まれる色を np.unique（ソート）ではなく24bit色の表で調べる
+# （表の確保に約8msかかるが、実測で約25万画素から表の方が速い）
+COLOR_TABLE_MIN_PIXELS = 1 << 18
+
+# ディザリングのカーネルに渡す色空間の番号
+COLOR_SPACE_IDS = {"rgb": 0, "lab": 1, "hsv": 2}
+
+
+def _pack_rgb565(rgb_u8: np.ndarray) -> np.ndarray:
+    """RGB888配列 (..., 3) をまとめてRGB565値の配列 (...) に変換"""
+    rgb = np.asarray(rgb_u8, dtype=np.uint16)
+    return ((rgb[..., 0] & 0xF8) << 8) | ((rgb[..., 1] & 0xFC) << 3) | (rgb[..., 2] >> 3)
+
+
+# 組み込みパレットのRGB565値（インポート時に一度だけ変換）
+PALETTES_RGB565 = {
+    name: tuple(_pack_rgb565(colors).tolist())
+    for name, colors in PALETTES.items()
+}
+
+
+def _unpack_rgb24(colors: np.ndarray) -> np.ndarray:
+    """0xRRGGBB形式の値の配列 (N,) をRGB配列 (N, 3) に戻す"""
+    return np.stack([colors >> 16, (colors >> 8) & 0xFF, colors & 0xFF], axis=1)
 
 
 def sanitize_variable_name(filename: str) -> str:
@@ -46,6 +178,127 @@ def sanitize_variable_name(filename: str) -> str:
     return name
 
 
+def _rgb_to_lab_array(rgb: np.ndarray) -> np.ndarray:
+    """RGB配列 (..., 3) をまとめてLAB配列 (..., 3) に変換"""
+    # RGB to XYZ（ガンマ補正を解除してから行列変換）
+    c = np.asarray(rgb, dtype=np.float64) / 255.0
+    linear = np.where(c > 0.04045, ((c + 0.055) / 1.055) ** 2.4, c / 12.92)
+    
+    # D65 白色点で正規化
+    xyz = (linear @ SRGB_TO_XYZ.T) / D65_WHITE
+    
+    # XYZ to LAB
+    f = np.where(xyz > 0.008856, np.cbrt(xyz), 7.787 * xyz + 16 / 116)
+    fx, fy, fz = f[..., 0], f[..., 1], f[..., 2]
+    
+    return np.stack([116 * fy - 16, 500 * (fx - fy), 200 * (fy - fz)], axis=-1)
+
+
+def _rgb_to_hsv_array(rgb: np.ndarray) -> np.ndarray:
+    """RGB配列 (..., 3) をまとめてHSV配列 (..., 3) に変換（colorsys.rgb_to_hsv と同じ計算）"""
+    c = np.asarray(rgb, dtype=np.float64) / 255
+    r, g, b = c[..., 0], c[..., 1], c[..., 2]
+    maxc = c.max(axis=-1)
+    minc = c.min(axis=-1)
+    rangec = maxc - minc
+    gray = rangec == 0  # 無彩色は色相・彩度とも0
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        s = np.where(gray, 0.0, rangec / maxc)
+        rc = (maxc - r) / rangec
+        gc = (maxc - g) / rangec
+        bc = (maxc - b) / rangec
+        h = np.where(r == maxc, bc - gc, np.where(g == maxc, 2.0 + rc - bc, 4.0 + gc - rc))
+        h = np.where(gray, 0.0, (h / 6.0) % 1.0)
+    
+    return np.stack([h, s, maxc], axis=-1)
+
+
+def _fs_dither_kernel(img, alpha, space, palette_features, palette_rgb, transparent_index, cache, out):
+    """
+    Floyd-Steinbergディザリングの本体（numbaがあれば _jit でコンパイルして使う）
+    img は float32 の作業用配列 (H, W, 3) で、誤差拡散により書き換えられる
+    alpha が128未満のピクセルは透明色にし、誤差も拡散しない
+    最も近いパレット色は色空間 space（COLOR_SPACE_IDS）での距離で正確に求め、
+    cache（0xRRGGBB → インデックス、未計算は255）に記録して同じ色で使い回す
+    """
+    height, width = out.shape
+    for y in range(height):
+        for x in range(width):
+            if alpha[y, x] < 128:  # 透明
+                out[y, x] = transparent_index
+                continue
+            
+            # クランプ処理
+            r = min(max(int(img[y, x, 0]), 0), 255)
+            g = min(max(int(img[y, x, 1]), 0), 255)
+            b = min(max(int(img[y, x, 2]), 0), 255)
+            
+            key = (r << 16) | (g << 8) | b
+            closest_idx = cache[key]
+            if closest_idx == 255:
+                # 初めての色はパレット全色との距離を計算する
+                # （_rgb_to_lab_array・_rgb_to_hsv_array と同じ計算）
+                f0, f1, f2 = float(r), float(g), float(b)
+                if space == 1:  # LAB
+                    c0, c1, c2 = f0 / 255.0, f1 / 255.0, f2 / 255.0
+                    l0 = ((c0 + 0.055) / 1.055) ** 2.4 if c0 > 0.04045 else c0 / 12.92
+                    l1 = ((c1 + 0.055) / 1.055) ** 2.4 if c1 > 0.04045 else c1 / 12.92
+                    l2 = ((c2 + 0.055) / 1.055) ** 2.4 if c2 > 0.04045 else c2 / 12.92
+                    xyz_x = (l0 * SRGB_TO_XYZ[0, 0] + l1 * SRGB_TO_XYZ[0, 1] + l2 * SRGB_TO_XYZ[0, 2]) / D65_WHITE[0]
+                    xyz_y = (l0 * SRGB_TO_XYZ[1, 0] + l1 * SRGB_TO_XYZ[1, 1] + l2 * SRGB_TO_XYZ[1, 2]) / D65_WHITE[1]
+                    xyz_z = (l0 * SRGB_TO_XYZ[2, 0] + l1 * SRGB_TO_XYZ[2, 1] + l2 * SRGB_TO_XYZ[2, 2]) / D65_WHITE[2]
+                    fx = np.cbrt(xyz_x) if xyz_x > 0.008856 else 7.787 * xyz_x + 16 / 116
+                    fy = np.cbrt(xyz_y) if xyz_y > 0.008856 else 7.787 * xyz_y + 16 / 116
+                    fz = np.cbrt(xyz_z) if xyz_z > 0.008856 else 7.787 * xyz_z + 16 / 116
+                    f0, f1, f2 = 116 * fy - 16, 500 * (fx - fy), 200 * (fy - fz)
+                elif space == 2:  # HSV
+                    c0, c1, c2 = f0 / 255, f1 / 255, f2 / 255
+                    maxc = max(c0, c1, c2)
+                    rangec = maxc - min(c0, c1, c2)
+                    if rangec == 0:  # 無彩色
+                        f0, f1, f2 = 0.0, 0.0, maxc
+                    else:
+                        rc = (maxc - c0) / rangec
+                        gc = (maxc - c1) / rangec
+                        bc = (maxc - c2) / rangec
+                        if c0 == maxc:
+                            h = bc - gc
+                        elif c1 == maxc:
+                            h = 2.0 + rc - bc
+                        else:
+                            h = 4.0 + gc - rc
+                        f0, f1, f2 = (h / 6.0) % 1.0, rangec / maxc, maxc
+                
+                best_dist = np.inf
+                for i in range(palette_features.shape[0]):
+                    d0 = f0 - palette_features[i, 0]
+                    if space == 2:
+                        d0 = abs(d0)
+                        d0 = min(d0, 1 - d0)  # 色相は円形
+                    d1 = f1 - palette_features[i, 1]
+                    d2 = f2 - palette_features[i, 2]
+                    dist = d0 * d0 + d1 * d1 + d2 * d2
+                    if dist < best_dist:
+                        best_dist = dist
+                        closest_idx = i
+                cache[key] = closest_idx
+            out[y, x] = closest_idx
+            
+            # エラー拡散（透明ピクセルには拡散しない）
+            for c in range(3):
+                quant_error = img[y, x, c] - palette_rgb[closest_idx, c]
+                if x < width - 1 and alpha[y, x + 1] >= 128:
+                    img[y, x + 1, c] += quant_error * 7 / 16
+                if y < height - 1:
+                    if x > 0 and alpha[y + 1, x - 1] >= 128:
+                        img[y + 1, x - 1, c] += quant_error * 3 / 16
+                    if alpha[y + 1, x] >= 128:
+                        img[y + 1, x, c] += quant_error * 5 / 16
+                    if x < width - 1 and alpha[y + 1, x + 1] >= 128:
+                        img[y + 1, x + 1, c] += quant_error * 1 / 16
+
+
 class ColorPalette:
     """16色カラーパレット管理クラス"""
     
@@ -59,93 +312,16 @@ class ColorPalette:
     
     def _load_palette(self, name: str):
         """パレットを読み込み"""
-        palettes = {
-            "classic": [
-                (0, 0, 0),        # 0: 透明色（黒）
-                (255, 255, 255),  # 1: 白
-                (248, 0, 0),      # 2: 赤
-                (0, 248, 0),      # 3: 緑
-                (0, 0, 248),      # 4: 青
-                (248, 248, 0),    # 5: 黄
-                (248, 0, 248),    # 6: マゼンタ
-                (0, 248, 248),    # 7: シアン
-                (132, 132, 132),  # 8: グレー
-                (252, 100, 0),    # 9: オレンジ
-                (128, 0, 0),      # 10: ダークレッド
-                (0, 100, 0),      # 11: ダークグリーン
-                (0, 0, 128),      # 12: ダークブルー
-                (132, 100, 0),    # 13: ブラウン
-                (66, 66, 66),     # 14: ダークグレー
-                (33, 33, 33),     # 15: ベリーダーク
-            ],
-            "gameboy": [
-                (0, 0, 0),        # 0: 透明色
-                (155, 188, 15),   # 1: ライトグリーン
-                (139, 172, 15),   # 2: 
-                (123, 156, 15),   # 3:
-                (107, 140, 15),   # 4:
-                (91, 124, 15),    # 5:
-                (75, 108, 15),    # 6:
-                (59, 92, 15),     # 7:
-                (43, 76, 15),     # 8:
-                (27, 60, 15),     # 9:
-                (15, 56, 15),     # 10: ダークグリーン
-                (0, 40, 0),       # 11:
-                (0, 32, 0),       # 12:
-                (0, 24, 0),       # 13:
-                (0, 16, 0),       # 14:
-                (0, 8, 0),        # 15:
-            ],
-            "sepia": [
-                (0, 0, 0),        # 0: 透明色
-                (255, 255, 255),  # 1: セピア白
-                (240, 220, 180),  # 2:
-                (220, 200, 160),  # 3:
-                (200, 180, 140),  # 4:
-                (180, 160, 120),  # 5:
-                (160, 140, 100),  # 6:
-                (140, 120, 80),   # 7:
-                (120, 100, 60),   # 8:
-                (100, 80, 40),    # 9:
-                (80, 60, 20),     # 10:
-                (70, 50, 15),     # 11:
-                (60, 40, 10),     # 12:
-                (50, 30, 5),      # 13:
-                (40, 20, 0),      # 14:
-                (20, 10, 0),      # 15: セピア黒
-            ],
-            "neon": [
-                (0, 0, 0),        # 0: 透明色
-                (255, 255, 255),  # 1: 白
-                (255, 0, 255),    # 2: ネオンピンク
-                (0, 255, 255),    # 3: ネオンシアン
-                (255, 255, 0),    # 4: ネオンイエロー
-                (255, 128, 0),    # 5: ネオンオレンジ
-                (128, 255, 0),    # 6: ネオングリーン
-                (0, 255, 128),    # 7: 
-                (0, 128, 255),    # 8: ネオンブルー
-                (128, 0, 255),    # 9: ネオンパープル
-                (255, 0, 128),    # 10:
-                (192, 192, 192),  # 11: シルバー
-                (128, 128, 128),  # 12: グレー
-                (64, 64, 64),     # 13: ダークグレー
-                (32, 32, 32),     # 14:
-                (16, 16, 16),     # 15:
-            ]
-        }
-        
-        if name not in palettes:
-            raise ValueError(f"Unknown palette: {name}. Available: {list(palettes.keys())}")
-        
-        self.colors_rgb = palettes[name]
-        self._convert_to_rgb565()
+        if name not in PALETTES:
+            raise ValueError(f"Unknown palette: {name}. Available: {list(PALETTES.keys())}")
+        
+        # 色はカスタム色で書き換えられるのでインスタンスごとにコピーする
+        self.colors_rgb = list(PALETTES[name])
+        self.colors_rgb565 = list(PALETTES_RGB565[name])
     
     def _convert_to_rgb565(self):
         """RGB888をRGB565に変換"""
-        self.colors_rgb565 = []
-        for r, g, b in self.colors_rgb:
-            rgb565 = ((r & 0xF8) << 8) | ((g & 0xFC) << 3) | (b >> 3)
-            self.colors_rgb565.append(rgb565)
+        self.colors_rgb565 = _pack_rgb565(self.colors_rgb).tolist()
     
     def add_custom_color(self, index: int, r: int, g: int, b: int):
         """カスタム色を追加"""
@@ -158,19 +334,20 @@ class ColorPalette:
         img = Image.new('RGB', (cell_size * 4, cell_size * 4))
         draw = ImageDraw.Draw(img)
         
+        # 透明色用の市松模様（4ピクセル単位）を一度だけ作成
+        cells = np.arange(cell_size) // 4
+        checker = np.where(((cells[:, None] + cells[None, :]) % 2)[..., None],
+                           np.array([200, 200, 200], dtype=np.uint8),
+                           np.array([100, 100, 100], dtype=np.uint8))
+        checker_img = Image.fromarray(checker)
+        
         for i, (r, g, b) in enumerate(self.colors_rgb):
             x = (i % 4) * cell_size
             y = (i // 4) * cell_size
             
             # 透明色の場合は市松模様
             if i == self.transparent_index:
-                for py in range(cell_size):
-                    for px in range(cell_size):
-                        if (px // 4 + py // 4) % 2:
-                            color = (200, 200, 200)
-                        else:
-                            color = (100, 100, 100)
-                        draw.point((x + px, y + py), color)
+                img.paste(checker_img, (x, y))
             else:
                 draw.rectangle([x, y, x + cell_size - 1, y + cell_size - 1], fill=(r, g, b))
             
@@ -188,72 +365,95 @@ class ColorQuantizer:
         self.palette = palette
         self.color_space = color_space.lower()
         
-        # パレット色をLAB色空間に変換（より正確な色距離計算のため）
+        # パレット色をLAB色空間に変換（より正確な色距離計算のため）(16, 3)
         if self.color_space == "lab":
-            self.palette_lab = [self._rgb_to_lab(r, g, b) for r, g, b in palette.colors_rgb]
-    
-    def _rgb_to_lab(self, r: int, g: int, b: int) -> Tuple[float, float, float]:
-        """RGB to LAB conversion"""
-        # RGB to XYZ
-        r, g, b = r / 255.0, g / 255.0, b / 255.0
-        
-        def gamma_correct(c):
-            return ((c + 0.055) / 1.055) ** 2.4 if c > 0.04045 else c / 12.92
-        
-        r, g, b = gamma_correct(r), gamma_correct(g), gamma_correct(b)
+            self.palette_lab = _rgb_to_lab_array(palette.colors_rgb)
+        elif self.color_space == "hsv":
+            self.palette_hsv_arr = _rgb_to_hsv_array(palette.colors_rgb)
         
-        # XYZ using sRGB matrix
-        x = r * 0.4124564 + g * 0.3575761 + b * 0.1804375
-        y = r * 0.2126729 + g * 0.7151522 + b * 0.0721750
-        z = r * 0.0193339 + g * 0.1191920 + b * 0.9503041
+        # 画像全体を一括で処理するためのパレット配列 (16, 3)
+        self.palette_rgb_arr = np.asarray(palette.colors_rgb, dtype=np.float64)
         
-        # XYZ to LAB
-        def f(t):
-            return t ** (1/3) if t > 0.008856 else (7.787 * t + 16/116)
+        # ディザリングの誤差計算用（作業用画像と同じfloat32）
+        self.palette_rgb_f32 = np.asarray(palette.colors_rgb, dtype=np.float32)
         
-        # D65 白色点で正規化
-        x, y, z = x / 0.95047, y / 1.00000, z / 1.08883
+        # パレット画像用データ [r0, g0, b0, r1, g1, b1, ...]
+        self.palette_data = []
+        for r, g, b in palette.colors_rgb:
+            self.palette_data.extend([r, g, b])
         
-        fx, fy, fz = f(x), f(y), f(z)
-        
-        L = 116 * fy - 16
-        a = 500 * (fx - fy)
-        b = 200 * (fy - fz)
-        
-        return (L, a, b)
-    
-    def _color_distance(self, color1: Tuple, color2: Tuple) -> float:
-        """色距離を計算"""
+        # ディザリングで色距離を計算するパレット色の座標 (16, 3)
         if self.color_space == "lab":
-            # ΔE CIE76 距離
-            dL, da, db = color1[0] - color2[0], color1[1] - color2[1], color1[2] - color2[2]
-            return math.sqrt(dL*dL + da*da + db*db)
+            self.palette_features = self.palette_lab
         elif self.color_space == "rgb":
-            # RGB ユークリッド距離
-            dr, dg, db = color1[0] - color2[0], color1[1] - color2[1], color1[2] - color2[2]
-            return math.sqrt(dr*dr + dg*dg + db*db)
+            self.palette_features = self.palette_rgb_arr
         else:
-            # HSV距離
-            h1, s1, v1 = colorsys.rgb_to_hsv(color1[0]/255, color1[1]/255, color1[2]/255)
-            h2, s2, v2 = colorsys.rgb_to_hsv(color2[0]/255, color2[1]/255, color2[2]/255)
-            
-            dh = min(abs(h1 - h2), 1 - abs(h1 - h2))  # 色相は円形
-            ds, dv = s1 - s2, v1 - v2
-            return math.sqrt(dh*dh + ds*ds + dv*dv)
+            self.palette_features = self.palette_hsv_arr
     
     def find_closest_color(self, r: int, g: int, b: int) -> int:
         """最も近いパレット色のインデックスを取得"""
+        return int(self._closest_indices(np.array([[r, g, b]]))[0])
+    
+    def _palette_distances_sq(self, colors: np.ndarray) -> np.ndarray:
+        """色の配列 (N, 3) と全パレット色との距離の2乗 (N, 16) をまとめて計算（比較のみなので平方根は取らない）"""
         if self.color_space == "lab":
-            target_lab = self._rgb_to_lab(r, g, b)
-            distances = [self._color_distance(target_lab, pal_lab) for pal_lab in self.palette_lab]
+            diff = _rgb_to_lab_array(colors)[:, None, :] - self.palette_lab[None, :, :]
+            return (diff * diff).sum(axis=-1)
+        elif self.color_space == "rgb":
+            diff = colors.astype(np.float64)[:, None, :] - self.palette_rgb_arr[None, :, :]
+            return (diff * diff).sum(axis=-1)
         else:
-            target = (r, g, b)
-            distances = [self._color_distance(target, pal_rgb) for pal_rgb in self.palette.colors_rgb]
-        
-        return distances.index(min(distances))
+            diff = _rgb_to_hsv_array(colors)[:, None, :] - self.palette_hsv_arr[None, :, :]
+            dh = np.abs(diff[..., 0])
+            dh = np.minimum(dh, 1 - dh)  # 色相は円形
+            return dh * dh + diff[..., 1] ** 2 + diff[..., 2] ** 2
+    
+    def _closest_indices(self, colors: np.ndarray) -> np.ndarray:
+        """色の配列 (N, 3) それぞれについて最も近いパレット色のインデックス (N,) を取得"""
+        indices = np.empty(len(colors), dtype=np.uint8)
+        for start in range(0, len(colors), CLOSEST_CHUNK_COLORS):
+            end = start + CLOSEST_CHUNK_COLORS
+            indices[start:end] = self._palette_distances_sq(colors[start:end]).argmin(axis=1)
+        
+        return indices
+    
+    def quantize_array(self, rgb: np.ndarray) -> np.ndarray:
+        """RGB配列 (H, W, 3) を最も近いパレット色のインデックス配列 (H, W) に一括変換"""
+        # 画像に含まれる色ごとに一度だけ最も近いパレット色を正確に求め、各ピクセルに戻す
+        packed = ((rgb[..., 0].astype(np.uint32) << 16)
+                  | (rgb[..., 1].astype(np.uint32) << 8)
+                  | rgb[..., 2])
+        
+        if packed.size >= COLOR_TABLE_MIN_PIXELS:
+            # 使われている24bit色に印を付け、色 → インデックスの表を引く
+            used = np.zeros(1 << 24, dtype=bool)
+            used[packed] = True
+            colors = np.flatnonzero(used)
+            table = np.empty(1 << 24, dtype=np.uint8)
+            table[colors] = self._closest_indices(_unpack_rgb24(colors))
+            return table[packed]
+        
+        colors, inverse = np.unique(packed, return_inverse=True)
+        return self._closest_indices(_unpack_rgb24(colors))[inverse].reshape(packed.shape)
+    
+    def _nearest_indices(self, image: Image.Image) -> np.ndarray:
+        """RGB画像の各ピクセルを最も近いパレット色のインデックス配列 (H, W) に変換"""
+        # PILの減色処理（quantize）は近似的な探索で最も近い色を外すことがあるため使わない
+        return self.quantize_array(np.array(image))
     
     def quantize_image(self, image: Image.Image, dither: bool = False) -> Image.Image:
         """画像を16色に減色"""
+        return self.indices_to_image(self.quantize_indices(image, dither))
+    
+    def indices_to_image(self, result_array: np.ndarray) -> Image.Image:
+        """インデックス配列 (H, W) からパレット画像を作成（BMP・プレビュー保存用）"""
+        result = Image.fromarray(result_array, mode='P')
+        result.putpalette(self.palette_data)
+        
+        return result
+    
+    def quantize_indices(self, image: Image.Image, dither: bool = False) -> np.ndarray:
+        """画像を16色に減色し、パレットのインデックス配列 (H, W) を返す"""
         # RGBA対応
         if image.mode == 'RGBA':
             # 透明部分を透明色（インデックス0）に変換
@@ -278,209 +478,101 @@ class ColorQuantizer:
         
         return result
     
-    def _quantize_with_alpha(self, image: Image.Image, alpha_channel: np.ndarray) -> Image.Image:
+    def _quantize_with_alpha(self, image: Image.Image, alpha_channel: np.ndarray) -> np.ndarray:
         """透明度を考慮したシンプルな量子化"""
-        width, height = image.size
-        image_array = np.array(image)
-        result_array = np.zeros((height, width), dtype=np.uint8)
-        
-        for y in range(height):
-            for x in range(width):
-                if alpha_channel[y, x] < 128:  # 透明
-                    result_array[y, x] = self.palette.transparent_index
-                else:
-                    r, g, b = image_array[y, x]
-                    closest_idx = self.find_closest_color(r, g, b)
-                    result_array[y, x] = closest_idx
-        
-        # パレット画像として結果を作成
-        result = Image.fromarray(result_array, mode='P')
-        palette_data = []
-        for r, g, b in self.palette.colors_rgb:
-            palette_data.extend([r, g, b])
-        result.putpalette(palette_data)
+        # 一括で量子化した後、透明部分を透明色に置き換え
+        result_array = self._nearest_indices(image)
+        result_array[alpha_channel < 128] = self.palette.transparent_index
         
-        return result
+        return result_array
     
-    def _simple_quantize(self, image: Image.Image) -> Image.Image:
+    def _simple_quantize(self, image: Image.Image) -> np.ndarray:
         """シンプルな最近傍量子化"""
-        width, height = image.size
-        image_array = np.array(image.convert('RGB'))
-        result_array = np.zeros((height, width), dtype=np.uint8)
-        
-        # パレット画像用データを作成
-        palette_data = []
-        for r, g, b in self.palette.colors_rgb:
-            palette_data.extend([r, g, b])
-        
-        for y in range(height):
-            for x in range(width):
-                r, g, b = image_array[y, x]
-                closest_idx = self.find_closest_color(r, g, b)
-                result_array[y, x] = closest_idx
-        
-        result = Image.fromarray(result_array, mode='P')
-        result.putpalette(palette_data)
-        
-        return result
+        return self._nearest_indices(image.convert('RGB'))
     
-    def _floyd_steinberg_dither(self, image: Image.Image) -> Image.Image:
+    def _floyd_steinberg_dither(self, image: Image.Image) -> np.ndarray:
         """Floyd-Steinbergディザリング"""
         width, height = image.size
-        image_array = np.array(image.convert('RGB'), dtype=np.float32)
-        result_array = np.zeros((height, width), dtype=np.uint8)
-        
-        # パレット画像用データを作成
-        palette_data = []
-        for r, g, b in self.palette.colors_rgb:
-            palette_data.extend([r, g, b])
         
-        for y in range(height):
-            for x in range(width):
-                old_pixel = image_array[y, x]
-                r, g, b = old_pixel.astype(int)
-                
-                # クランプ処理
-                r = max(0, min(255, r))
-                g = max(0, min(255, g))
-                b = max(0, min(255, b))
-                
-                closest_idx = self.find_closest_color(r, g, b)
-                result_array[y, x] = closest_idx
-                
-                new_pixel = np.array(self.palette.colors_rgb[closest_idx], dtype=np.float32)
-                quant_error = old_pixel - new_pixel
-                
-                # エラー拡散
-                if x < width - 1:
-                    image_array[y, x + 1] += quant_error * 7/16
-                if y < height - 1:
-                    if x > 0:
-                        image_array[y + 1, x - 1] += quant_error * 3/16
-                    image_array[y + 1, x] += quant_error * 5/16
-                    if x < width - 1:
-                        image_array[y + 1, x + 1] += quant_error * 1/16
-        
-        result = Image.fromarray(result_array, mode='P')
-        result.putpalette(palette_data)
-        
-        return result
+        # 透明部分なしとして透明度対応版と同じ処理を行う
+        alpha_channel = np.full((height, width), 255, dtype=np.uint8)
+        return self._floyd_steinberg_dither_with_alpha(image.convert('RGB'), alpha_channel)
     
-    def _floyd_steinberg_dither_with_alpha(self, image: Image.Image, alpha_channel: np.ndarray) -> Image.Image:
+    def _floyd_steinberg_dither_with_alpha(self, image: Image.Image, alpha_channel: np.ndarray) -> np.ndarray:
         """透明度対応Floyd-Steinbergディザリング"""
         width, height = image.size
         image_array = np.array(image, dtype=np.float32)
         result_array = np.zeros((height, width), dtype=np.uint8)
         
-        # パレット画像用データを作成
-        palette_data = []
-        for r, g, b in self.palette.colors_rgb:
-            palette_data.extend([r, g, b])
-        
-        for y in range(height):
-            for x in range(width):
-                if alpha_channel[y, x] < 128:  # 透明
-                    result_array[y, x] = self.palette.transparent_index
-                    continue
-                
-                old_pixel = image_array[y, x]
-                r, g, b = old_pixel.astype(int)
-                
-                # クランプ処理
-                r = max(0, min(255, r))
-                g = max(0, min(255, g))
-                b = max(0, min(255, b))
-                
-                closest_idx = self.find_closest_color(r, g, b)
-                result_array[y, x] = closest_idx
-                
-                new_pixel = np.array(self.palette.colors_rgb[closest_idx], dtype=np.float32)
-                quant_error = old_pixel - new_pixel
-                
-                # エラー拡散（透明ピクセルには拡散しない）
-                if x < width - 1 and alpha_channel[y, x + 1] >= 128:
-                    image_array[y, x + 1] += quant_error * 7/16
-                if y < height - 1:
-                    if x > 0 and alpha_channel[y + 1, x - 1] >= 128:
-                        image_array[y + 1, x - 1] += quant_error * 3/16
-                    if alpha_channel[y + 1, x] >= 128:
-                        image_array[y + 1, x] += quant_error * 5/16
-                    if x < width - 1 and alpha_channel[y + 1, x + 1] >= 128:
-                        image_array[y + 1, x + 1] += quant_error * 1/16
+        # 色ごとの最も近いパレット色の記録（0xRRGGBB → インデックス、255は未計算）
+        cache = np.full(1 << 24, 255, dtype=np.uint8)
         
-        result = Image.fromarray(result_array, mode='P')
-        result.putpalette(palette_data)
+        # numbaが無い環境では通常のPython関数として実行する（低速）
+        dither = _jit(_fs_dither_kernel) or _fs_dither_kernel
+        dither(image_array, np.ascontiguousarray(alpha_channel), COLOR_SPACE_IDS.get(self.color_space, 2),
+               self.palette_features, self.palette_rgb_f32, self.palette.transparent_index, cache, result_array)
         
-        return result
+        return result_array
 
 
 class M5DataGenerator:
     """M5StampPico用データ生成クラス（改良版）"""
     
     @staticmethod
-    def generate_data_array(quantized_image: Image.Image, base_var_name: str) -> str:
-        """1バイト2ピクセル形式のC配列を生成（改良版）"""
-        width, height = quantized_image.size
-        image_array = np.array(quantized_image)
-        
-        # 1バイトに2ピクセル格納
-        data_bytes = []
-        for y in range(height):
-            for x in range(0, width, 2):
-                pixel1 = image_array[y, x] if x < width else 0
-                pixel2 = image_array[y, x + 1] if x + 1 < width else 0
-                
-                # 下位4bit: 偶数ピクセル, 上位4bit: 奇数ピクセル
-                byte_value = (pixel2 << 4) | (pixel1 & 0x0F)
-                data_bytes.append(byte_value)
+    def generate_data_array(quantized_image, base_var_name: str) -> str:
+        """1バイト2ピクセル形式のC配列を生成（改良版）
+        
+        quantized_image にはパレット画像またはインデックス配列 (H, W) を渡せる
+        """
+        image_array = np.asarray(quantized_image, dtype=np.uint8)
+        height, width = image_array.shape
+        
+        # 幅が奇数の場合は右端を0で埋めて2ピクセルずつの組にする
+        if width % 2:
+            image_array = np.pad(image_array, ((0, 0), (0, 1)))
+        pairs = image_array.reshape(height, -1, 2)
+        
+        # 1バイトに2ピクセル格納（下位4bit: 偶数ピクセル, 上位4bit: 奇数ピクセル）
+        data_bytes = ((pairs[..., 1] << 4) | (pairs[..., 0] & 0x0F)).tobytes()
+        data_size = len(data_bytes)
         
         # 変数名を生成
         data_var = f"{base_var_name}_data"
         width_var = f"{base_var_name}_width"
         height_var = f"{base_var_name}_height"
+        upper_name = base_var_name.upper()
+        saving = (width * height * 2 - data_size) / (width * height * 2) * 100
+        
+        # 16バイトずつ改行して見やすく（1行分をまとめて16進文字列にしてから区切りを入れる）
+        hex_rows = ",\n".join(
+            "    0x" + data_bytes[i:i+16].hex(' ').upper().replace(' ', ', 0x')
+            for i in range(0, data_size, 16)
+        )
         
         # C言語配列形式で出力
-        lines = [f"// Image: {width}x{height} pixels, 16-color palette"]
-        lines.append(f"// Generated data size: {len(data_bytes)} bytes")
-        lines.append(f"// Memory efficiency: {((width * height * 2 - len(data_bytes)) / (width * height * 2) * 100):.1f}% saving vs 16-bit")
-        lines.append("")
-        
-        # 画像サイズ定数
-        lines.append(f"// 画像サイズ情報")
-        lines.append(f"const uint16_t {width_var} = {width};")
-        lines.append(f"const uint16_t {height_var} = {height};")
-        lines.append("")
-        
-        # 画像データ配列
-        lines.append(f"// 画像データ配列（1バイトに2ピクセル格納）")
-        lines.append(f"const uint8_t {data_var}[{len(data_bytes)}] = {{")
-        
-        # 16バイトずつ改行して見やすく
-        for i in range(0, len(data_bytes), 16):
-            chunk = data_bytes[i:i+16]
-            hex_values = [f"0x{b:02X}" for b in chunk]
-            line = "    " + ", ".join(hex_values)
-            if i + 16 < len(data_bytes):
-                line += ","
-            lines.append(line)
-        
-        lines.append("};")
-        lines.append("")
-        
-        # 使用例とマクロ定義
-        lines.append(f"// 便利なマクロ定義")
-        lines.append(f"#define {base_var_name.upper()}_WIDTH  {width}")
-        lines.append(f"#define {base_var_name.upper()}_HEIGHT {height}")
-        lines.append(f"#define {base_var_name.upper()}_SIZE   {len(data_bytes)}")
-        lines.append("")
-        
-        lines.append(f"// 使用例:")
-        lines.append(f"// PaletteImageData myImage({data_var}, {width_var}, {height_var});")
-        lines.append(f"// または")
-        lines.append(f"// PaletteImageData myImage({data_var}, {base_var_name.upper()}_WIDTH, {base_var_name.upper()}_HEIGHT);")
-        lines.append(f"// renderer.drawToCanvas(myImage, x, y, true);")
-        
-        return "\n".join(lines)
+        return f"""// Image: {width}x{height} pixels, 16-color palette
+// Generated data size: {data_size} bytes
+// Memory efficiency: {saving:.1f}% saving vs 16-bit
+
+// 画像サイズ情報
+const uint16_t {width_var} = {width};
+const uint16_t {height_var} = {height};
+
+// 画像データ配列（1バイトに2ピクセル格納）
+const uint8_t {data_var}[{data_size}] = {{
+{hex_rows}
+}};
+
+// 便利なマクロ定義
+#define {upper_name}_WIDTH  {width}
+#define {upper_name}_HEIGHT {height}
+#define {upper_name}_SIZE   {data_size}
+
+// 使用例:
+// PaletteImageData myImage({data_var}, {width_var}, {height_var});
+// または
+// PaletteImageData myImage({data_var}, {upper_name}_WIDTH, {upper_name}_HEIGHT);
+// renderer.drawToCanvas(myImage, x, y, true);"""
     
     @staticmethod
     def generate_palette_code(palette: ColorPalette, base_var_name: str) -> str:
@@ -488,46 +580,34 @@ class M5DataGenerator:
         palette_var = f"{base_var_name}_palette"
         init_func = f"{base_var_name}_palette_init"
         
-        lines = [f"// {palette.name.capitalize()} カラーパレット定義"]
-        lines.append(f"// パレット初期化関数")
-        lines.append(f"void {init_func}(RetroColorPalette& palette) {{")
-        
-        for i, (r, g, b) in enumerate(palette.colors_rgb):
-            rgb565 = palette.colors_rgb565[i]
-            if i == 0:
-                comment = "// 透明色"
-            else:
-                comment = f"// RGB({r},{g},{b})"
-            lines.append(f"    palette.setColor({i}, 0x{rgb565:04X}); {comment}")
-        
-        lines.append("}")
-        lines.append("")
-        
-        # パレット配列も生成
-        lines.append(f"// パレット配列定義（RGB565形式）")
-        lines.append(f"const uint16_t {palette_var}[16] = {{")
-        for i in range(0, 16, 4):
-            chunk = palette.colors_rgb565[i:i+4]
-            hex_values = [f"0x{c:04X}" for c in chunk]
-            line = "    " + ", ".join(hex_values)
-            if i + 4 < 16:
-                line += ","
-            
-            # コメント追加
-            comments = []
-            for j, idx in enumerate(range(i, min(i+4, 16))):
-                r, g, b = palette.colors_rgb[idx]
-                if idx == 0:
-                    comments.append("透明")
-                else:
-                    comments.append(f"RGB({r},{g},{b})")
-            line += "  // " + ", ".join(comments)
-            
-            lines.append(line)
-        
-        lines.append("};")
-        
-        return "\n".join(lines)
+        # 各色のコメント（インデックス0は透明色）
+        comments = ["透明"] + [f"RGB({r},{g},{b})" for r, g, b in palette.colors_rgb[1:]]
+        
+        # RGB565値をビッグエンディアンで並べ、1色4桁ずつの16進文字列にまとめて変換
+        hx = np.asarray(palette.colors_rgb565, dtype='>u2').tobytes().hex().upper()
+        
+        set_color_lines = "\n".join(
+            f"    palette.setColor({i}, 0x{hx[i*4:i*4+4]}); // {'透明色' if i == 0 else comments[i]}"
+            for i in range(16)
+        )
+        
+        # 4色ずつ改行し、行末にその行の色をコメントで付ける
+        array_rows = "\n".join(
+            "    0x" + ", 0x".join(hx[j*4:j*4+4] for j in range(i, i + 4))
+            + ("," if i + 4 < 16 else "") + f"  // {', '.join(comments[i:i+4])}"
+            for i in range(0, 16, 4)
+        )
+        
+        return f"""// {palette.name.capitalize()} カラーパレット定義
+// パレット初期化関数
+void {init_func}(RetroColorPalette& palette) {{
+{set_color_lines}
+}}
+
+// パレット配列定義（RGB565形式）
+const uint16_t {palette_var}[16] = {{
+{array_rows}
+}};"""
 
 
 def main():
@@ -571,7 +651,12 @@ def main():
             if max(image.size) > args.max_size:
                 ratio = args.max_size / max(image.size)
                 new_size = (int(image.size[0] * ratio), int(image.size[1] * ratio))
-                image = image.resize(new_size, Image.Resampling.LANCZOS)
+                
+                # JPEGはデコード時に1/2〜1/8へ縮小させる（JPEG以外では何もしない）
+                image.draft(image.mode, new_size)
+                
+                # 大きく縮小する場合は整数倍の縮小を先に行ってからLANCZOSで仕上げる
+                image = image.resize(new_size, Image.Resampling.LANCZOS, reducing_gap=3.0)
                 print(f"📏 Resized to: {image.size}")
             else:
                 print(f"📏 Size within limit, no resize needed")
@@ -598,11 +683,14 @@ def main():
     # 画像を減色
     print("🔄 Converting to 16-color palette...")
     try:
-        quantized = quantizer.quantize_image(image, args.dither)
+        indices = quantizer.quantize_indices(image, args.dither)
     except Exception as e:
         print(f"❌ Error during quantization: {e}")
         return 1
     
+    # BMP・プレビュー保存用のパレット画像（ヘッダー生成はインデックス配列を直接使う）
+    quantized = quantizer.indices_to_image(indices)
+    
     # BMP保存
     bmp_path = f"{output_prefix}.bmp"
     quantized.save(bmp_path)
@@ -617,7 +705,7 @@ def main():
     # M5StampPico用データ生成（改良版）
     print("🔢 Generating M5StampPico data...")
     try:
-        data_code = M5DataGenerator.generate_data_array(quantized, var_name)
+        data_code = M5DataGenerator.generate_data_array(indices, var_name)
         palette_code = M5DataGenerator.generate_palette_code(palette, var_name)
     except Exception as e:
         print(f"❌ Error generating code: {e}")
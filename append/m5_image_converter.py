@@ -8,6 +8,10 @@ M5Unified画像→Cヘッダー変換ツール
 出力形式: RGB565 (16bit) C配列 (.hファイル)
 """
 
+import binascii
+from concurrent.futures import ThreadPoolExecutor
+import io
+import mmap
 import os
 import sys
 from PIL import Image, ImageDraw
@@ -17,6 +21,185 @@ import argparse
 from typing import Tuple, Optional
 import datetime
 
+# ヘッダー書き出し時に一度に16進変換する行数（出力全体を一度にメモリに載せない）
+DATA_BLOCK_LINES = 1024
+
+# NumPyでRGB565変換するときの1回あたりの行数（中間配列がL2キャッシュに収まる大きさ）
+TILE_ROWS = 64
+
+# OpenCVで直接NumPy配列に読み込む画像形式（それ以外やOpenCVが無い場合はPILで読み込む）
+CV2_FORMATS = {'.png', '.jpg', '.jpeg', '.bmp'}
+
+# JPEGの拡張子（縮小する場合はPILのdraftで縮小デコードする）
+JPEG_FORMATS = {'.jpg', '.jpeg'}
+
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+
+# 16進数の各桁に対応するASCIIコード（numbaカーネルでヘッダーを直接書き込むときに使用）
+HEX_DIGITS = np.frombuffer(b"0123456789ABCDEF", dtype=np.uint8)
+
+# この画素数以上の画像だけnumbaカーネルを使う
+# numbaはインポートだけで約0.3秒かかる。RGB565変換のNumPy版との差は約2.5ns/画素しかなく、
+# ヘッダー書き出しの短縮（約77ns/画素）と合わせて元が取れるのは約390万画素から（実測）
+NUMBA_MIN_PIXELS = 1 << 22
+
+# numbaでコンパイルしたカーネル {元の関数: コンパイル済み関数 (numbaが無い場合はNone)}
+_NUMBA_KERNELS = {}
+
+
+def _jit(func):
+    """
+    func をnumbaでコンパイルした関数を返す（numbaが無い場合はNone）
+    numbaのインポートは重いので、初めて必要になったときに読み込む
+    """
+    if func not in _NUMBA_KERNELS:
+        try:
+            from numba import njit
+        except ImportError:
+            _NUMBA_KERNELS[func] = None
+        else:
+            _NUMBA_KERNELS[func] = njit(cache=True)(func)
+    return _NUMBA_KERNELS[func]
+
+
+def _pack_rgb565(img, out):
+    """
+    RGB888配列 (H, W, 3) をRGB565配列 (H, W) に変換するnumbaカーネル（_jit でコンパイルして使う）
+    読み出し・シフト・ORを1パスで行い、中間配列を作らない
+    img はC連続配列であること（ループはy外側・x内側の行優先順でメモリを順に読む）
+    """
+    for y in range(img.shape[0]):
+        for x in range(img.shape[1]):
+            r = img[y, x, 0]
+            g = img[y, x, 1]
+            b = img[y, x, 2]
+            out[y, x] = ((r & 0xF8) << 8) | ((g & 0xFC) << 3) | (b >> 3)
+
+
+def _write_hex_lines(data, bytes_per_line, digits, out):
+    """
+    RGB565配列 (N,) をデータ配列の行（"  0xXXXX, 0xXXXX, ...," と改行）としてASCIIでoutに書き込む
+    書き込んだバイト数を返す（2 * 行数 + 8 * N - 1 バイト）
+    """
+    n = data.shape[0]
+    pos = 0
+    for i in range(n):
+        col = i % bytes_per_line
+        if col == 0:
+            out[pos] = 32  # ' '
+            out[pos + 1] = 32
+            pos += 2
+        
+        v = data[i]
+        out[pos] = 48  # '0'
+        out[pos + 1] = 120  # 'x'
+        out[pos + 2] = digits[(v >> 12) & 0xF]
+        out[pos + 3] = digits[(v >> 8) & 0xF]
+        out[pos + 4] = digits[(v >> 4) & 0xF]
+        out[pos + 5] = digits[v & 0xF]
+        pos += 6
+        
+        if i == n - 1:
+            out[pos] = 10  # 最後の値は改行のみ
+            pos += 1
+        elif col == bytes_per_line - 1:
+            out[pos] = 44  # 行末は ",\n"
+            out[pos + 1] = 10
+            pos += 2
+        else:
+            out[pos] = 44  # 値の間は ", "
+            out[pos + 1] = 32
+            pos += 2
+    return pos
+
+
+def _composite_on_white(arr: np.ndarray) -> np.ndarray:
+    """
+    アルファ付き配列 (H, W, 2 or 4) を白背景に合成してRGB配列 (H, W, 3) を返す
+    背景画像を作らずNumPyで1パスで合成する（PILのpasteと同じ丸め方）
+    """
+    color = arr[..., :3] if arr.shape[2] == 4 else arr[..., :1]  # LAは輝度をRGBに展開
+    alpha = arr[..., -1:].astype(np.uint16)  # アルファチャンネルをマスクに
+    blend = color * alpha + 255 * (255 - alpha) + 128
+    rgb = ((blend + (blend >> 8)) >> 8).astype(np.uint8)
+    return np.broadcast_to(rgb, arr.shape[:2] + (3,))
+
+
+def _has_alpha_channel(input_path: str) -> bool:
+    """PNGのカラータイプ（IHDR）がアルファチャンネル付き（グレー+アルファ・RGBA）かどうか"""
+    with open(input_path, 'rb') as f:
+        head = f.read(26)
+    return head[:8] == b'\x89PNG\r\n\x1a\n' and head[25] in (4, 6)
+
+
+def _pack_rgb565_rows(img: np.ndarray, out: np.ndarray, start: int, end: int) -> None:
+    """
+    RGB888配列 (H, W, 3) の start〜end 行をRGB565に変換して out に書き込む
+    TILE_ROWS 行ずつ処理し、チャンネルごとの中間配列をキャッシュに収める
+    """
+    for y in range(start, end, TILE_ROWS):
+        y_end = min(y + TILE_ROWS, end)
+        strip = img[y:y_end]
+        r = strip[..., 0].astype(np.uint16)
+        g = strip[..., 1].astype(np.uint16)
+        b = strip[..., 2].astype(np.uint16)
+        out[y:y_end] = ((r & 0xF8) << 8) | ((g & 0xFC) << 3) | (b >> 3)
+
+
+def _pack_rgb565_numpy(img: np.ndarray, out: np.ndarray) -> None:
+    """
+    RGB888配列 (H, W, 3) をRGB565配列 (H, W) に変換する（numbaを使わない場合用）
+    行の範囲ごとに独立なので、CPUコア数のスレッドに分けて並列に処理する
+    （NumPyの演算中はGILが解放される）
+    """
+    height = img.shape[0]
+    workers = min(os.cpu_count() or 1, (height + TILE_ROWS - 1) // TILE_ROWS)
+    if workers <= 1:
+        _pack_rgb565_rows(img, out, 0, height)
+        return
+    
+    bounds = np.linspace(0, height, workers + 1).astype(int)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_pack_rgb565_rows, img, out, start, end)
+                   for start, end in zip(bounds[:-1], bounds[1:])]
+        for future in futures:
+            future.result()
+
+
+def _fs_dither_rgb565(work):
+    """
+    RGB565の各チャンネルのビット数（5/6/5bit）に合わせたFloyd-Steinbergディザリング
+    work は int16 の作業用配列 (H, W, 3) で、その場で書き換えられる
+    """
+    height, width = work.shape[0], work.shape[1]
+    for y in range(height):
+        for x in range(width):
+            for c in range(3):
+                drop = 2 if c == 1 else 3  # 緑は下位2bit、赤・青は下位3bitを切り捨てる
+                old = work[y, x, c]
+                new = (old >> drop) << drop
+                err = old - new  # 切り捨てなので誤差は常に0以上
+                work[y, x, c] = new
+                
+                # 誤差を右・左下・下・右下に 7/16, 3/16, 5/16, 1/16 の割合で拡散
+                # （整数で切り捨てた端数は右下に回し、誤差の合計を保つ）
+                e7 = err * 7 // 16
+                e3 = err * 3 // 16
+                e5 = err * 5 // 16
+                e1 = err - e7 - e3 - e5
+                if x + 1 < width:
+                    work[y, x + 1, c] = min(work[y, x + 1, c] + e7, 255)
+                if y + 1 < height:
+                    if x > 0:
+                        work[y + 1, x - 1, c] = min(work[y + 1, x - 1, c] + e3, 255)
+                    work[y + 1, x, c] = min(work[y + 1, x, c] + e5, 255)
+                    if x + 1 < width:
+                        work[y + 1, x + 1, c] = min(work[y + 1, x + 1, c] + e1, 255)
+
+
 class M5ImageConverter:
     """
     M5Unified専用の画像変換クラス
@@ -64,53 +247,111 @@ class M5ImageConverter:
         """
         try:
             # 画像を読み込み（透明度も考慮）
-            with Image.open(input_path) as img:
-                print(f"📷 元画像情報: {img.size[0]}x{img.size[1]} {img.mode}にゃ")
-                
-                # 透明度がある場合は白背景で合成
-                if img.mode in ('RGBA', 'LA'):
-                    background = Image.new('RGB', img.size, (255, 255, 255))
-                    if img.mode == 'RGBA':
-                        background.paste(img, mask=img.split()[3])  # アルファチャンネルをマスクに
-                    else:  # LA mode
-                        background.paste(img, mask=img.split()[1])
-                    img = background
-                
-                # RGBモードに変換
-                if img.mode != 'RGB':
-                    img = img.convert('RGB')
-                
+            resize = bool(max_width or max_height)
+            img_array = self._load_fast(input_path, resize)
+            if img_array is None:
+                img_array = self._load_with_pil(input_path, max_width, max_height)
+            elif resize:
                 # サイズ制限がある場合はリサイズ（アスペクト比保持）
-                if max_width or max_height:
-                    img.thumbnail((max_width or img.width, max_height or img.height), 
-                                Image.Resampling.LANCZOS)
-                    print(f"🔄 リサイズ後: {img.size[0]}x{img.size[1]}にゃ")
-                
-                # ディザリング処理（より滑らかな減色）
-                if dithering:
-                    # Floyd-Steinbergディザリングで RGB565 相当の色数に減色
-                    img = img.quantize(colors=65536, method=Image.Quantize.FASTOCTREE, dither=Image.Dither.FLOYDSTEINBERG)
-                    img = img.convert('RGB')
-                    print("✨ ディザリング処理完了にゃ")
-                
-                # NumPy配列に変換
-                img_array = np.array(img)
-                height, width = img_array.shape[:2]
-                
-                # RGB565形式に変換
-                rgb565_data = np.zeros((height, width), dtype=np.uint16)
-                
-                print("🔄 RGB565変換中...")
-                for y in range(height):
-                    for x in range(width):
-                        r, g, b = img_array[y, x]
-                        rgb565_data[y, x] = self.rgb888_to_rgb565(r, g, b)
-                
-                return rgb565_data.flatten(), width, height
-                
+                img_array = np.asarray(self._resize(Image.fromarray(img_array), max_width, max_height))
+            
+            # ディザリング処理（より滑らかな減色）
+            if dithering:
+                # RGB565のビット数に合わせてFloyd-Steinbergディザリング（パレットは作らない）
+                # （Python版は約13µs/画素と遅いので、numbaがあれば画像の大きさによらず使う）
+                work = img_array.astype(np.int16)
+                (_jit(_fs_dither_rgb565) or _fs_dither_rgb565)(work)
+                img_array = work.astype(np.uint8)
+                print("✨ ディザリング処理完了にゃ")
+            height, width = img_array.shape[:2]
+            
+            # 変換は行優先（y外側・x内側）で走査するので、C連続配列にそろえておく
+            if not img_array.flags['C_CONTIGUOUS']:
+                img_array = np.ascontiguousarray(img_array)
+            
+            # RGB565形式に変換
+            print("🔄 RGB565変換中...")
+            rgb565_data = np.empty((height, width), dtype=np.uint16)
+            pack_kernel = _jit(_pack_rgb565) if height * width >= NUMBA_MIN_PIXELS else None
+            if pack_kernel is not None:
+                # 大きな画像はnumbaカーネルで出力配列に直接書き込む
+                pack_kernel(img_array, rgb565_data)
+            else:
+                # NumPyのビット演算で帯状に分けて処理
+                _pack_rgb565_numpy(img_array, rgb565_data)
+            
+            return rgb565_data.ravel(), width, height
+            
         except Exception as e:
             raise Exception(f"画像処理エラー: {str(e)}")
     
+    def _load_fast(self, input_path: str, resize: bool = False) -> Optional[np.ndarray]:
+        """
+        OpenCVで画像をRGB配列 (H, W, 3) として直接読み込む
+        OpenCVが無い・未対応の形式・読み込めない場合はNoneを返す（PILで読み込み直す）
+        """
+        suffix = Path(input_path).suffix.lower()
+        if cv2 is None or suffix not in CV2_FORMATS:
+            return None
+        
+        # JPEGを縮小する場合は、PILのdraftで縮小しながらデコードする方が速い
+        if resize and suffix in JPEG_FORMATS:
+            return None
+        
+        # IMREAD_UNCHANGEDはアルファを残し、EXIFの回転も適用しない（PILと同じ向き）
+        arr = cv2.imread(str(input_path), cv2.IMREAD_UNCHANGED)
+        if arr is None or arr.dtype != np.uint8:
+            return None
+        
+        if arr.ndim == 2:
+            print(f"📷 元画像情報: {arr.shape[1]}x{arr.shape[0]} Lにゃ")
+            return cv2.cvtColor(arr, cv2.COLOR_GRAY2RGB)
+        if arr.shape[2] == 4:
+            # 透過色（tRNS）付きのパレット・RGB画像などもアルファ付きで読み込まれるが、
+            # PILでは透過色を無視してRGBに変換するので、それに合わせてPILで読み込み直す
+            if not _has_alpha_channel(input_path):
+                return None
+            
+            # 透明度がある場合は白背景で合成
+            print(f"📷 元画像情報: {arr.shape[1]}x{arr.shape[0]} RGBAにゃ")
+            return _composite_on_white(cv2.cvtColor(arr, cv2.COLOR_BGRA2RGBA))
+        
+        print(f"📷 元画像情報: {arr.shape[1]}x{arr.shape[0]} RGBにゃ")
+        return cv2.cvtColor(arr, cv2.COLOR_BGR2RGB)
+    
+    def _load_with_pil(self, input_path: str, max_width: Optional[int] = None,
+                       max_height: Optional[int] = None) -> np.ndarray:
+        """
+        PILで画像を読み込み、RGB配列 (H, W, 3) に変換する
+        サイズ制限がある場合はリサイズも行う（JPEGはデコード前に縮小できる）
+        """
+        with Image.open(input_path) as img:
+            print(f"📷 元画像情報: {img.size[0]}x{img.size[1]} {img.mode}にゃ")
+            
+            if img.mode in ('RGBA', 'LA'):
+                # 透明度がある場合は白背景で合成
+                img_array = _composite_on_white(np.asarray(img))
+                if not (max_width or max_height):
+                    return img_array
+                img = Image.fromarray(img_array)
+            elif img.mode != 'RGB':
+                # RGBモードに変換
+                img = img.convert('RGB')
+            
+            # サイズ制限がある場合はリサイズ（アスペクト比保持）
+            # 読み込み前のJPEGはthumbnailがdraftで縮小デコードする
+            if max_width or max_height:
+                img = self._resize(img, max_width, max_height)
+            
+            return np.asarray(img)
+    
+    def _resize(self, img: Image.Image, max_width: Optional[int], max_height: Optional[int]) -> Image.Image:
+        """アスペクト比を保ったまま最大サイズに収まるよう縮小する"""
+        img.thumbnail((max_width or img.width, max_height or img.height), 
+                      Image.Resampling.LANCZOS)
+        print(f"🔄 リサイズ後: {img.size[0]}x{img.size[1]}にゃ")
+        return img
+    
     def generate_header_content(self, rgb565_data: np.ndarray, width: int, height: int,
                               array_name: str, input_filename: str, 
                               use_progmem: bool = True, 
@@ -130,12 +371,85 @@ class M5ImageConverter:
         Returns:
             Cヘッダーファイルの内容文字列
         """
-        timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        buffer = io.StringIO()
+        self.write_header(buffer, rgb565_data, width, height, array_name, input_filename,
+                          use_progmem, bytes_per_line)
+        return buffer.getvalue()
+    
+    def write_header(self, f, rgb565_data: np.ndarray, width: int, height: int,
+                     array_name: str, input_filename: str, 
+                     use_progmem: bool = True, 
+                     bytes_per_line: int = 12) -> None:
+        """
+        Cヘッダーファイルのコンテンツをファイルに1行ずつ書き出す
+        （文字列を連結しないので、大きな画像でも処理時間が画素数に比例する）
+        
+        Args:
+            f: 書き込み先のテキストファイル（io.StringIOも可）
+            rgb565_data: RGB565形式の画像データ
+            width: 画像の幅
+            height: 画像の高さ  
+            array_name: C配列の名前
+            input_filename: 元ファイル名
+            use_progmem: PROGMEM使用フラグ（Arduinoのフラッシュメモリ格納用）
+            bytes_per_line: 1行あたりの要素数
+        """
         total_pixels = len(rgb565_data)
+        f.write(self._header_prologue(total_pixels, width, height, array_name, input_filename,
+                                      use_progmem))
+        
+        # データ部分（見やすい形式で配置）
+        print("📝 Cコード生成中...")
+        f.writelines(self._iter_data_lines(rgb565_data, bytes_per_line))
+        
+        f.write(self._header_epilogue(array_name))
+    
+    def write_header_mmap(self, output_path, rgb565_data: np.ndarray, width: int, height: int,
+                          array_name: str, input_filename: str, 
+                          use_progmem: bool = True, 
+                          bytes_per_line: int = 12) -> None:
+        """
+        出力サイズを先に計算してファイルを確保し、mmap上にヘッダーを直接書き込む（numba使用時）
+        データ部分はnumbaカーネルがASCIIで書き込むので、Pythonの文字列を作らない
+        
+        Args:
+            output_path: 出力.hファイルのパス
+            その他の引数は write_header と同じ
+        """
+        total_pixels = len(rgb565_data)
+        prologue = self._header_prologue(total_pixels, width, height, array_name, input_filename,
+                                         use_progmem).encode('utf-8')
+        epilogue = self._header_epilogue(array_name).encode('utf-8')
+        
+        # データ部分のサイズ: 各行の先頭の空白2文字 + 各値の "0xXXXX, " 8文字 - 最後の値の区切り1文字分
+        total_lines = (total_pixels + bytes_per_line - 1) // bytes_per_line
+        data_size = 2 * total_lines + 8 * total_pixels - 1
+        total_size = len(prologue) + data_size + len(epilogue)
+        
+        print("📝 Cコード生成中...")
+        with open(output_path, 'w+b') as f:
+            os.ftruncate(f.fileno(), total_size)
+            with mmap.mmap(f.fileno(), total_size) as buf:
+                buf[:len(prologue)] = prologue
+                
+                out = np.frombuffer(buf, dtype=np.uint8, count=data_size, offset=len(prologue))
+                _jit(_write_hex_lines)(np.ascontiguousarray(rgb565_data, dtype=np.uint16), bytes_per_line,
+                                 HEX_DIGITS, out)
+                del out  # mmapを閉じる前にバッファへの参照を外す
+                
+                buf[total_size - len(epilogue):] = epilogue
+    
+    def _header_prologue(self, total_pixels: int, width: int, height: int,
+                         array_name: str, input_filename: str, use_progmem: bool) -> str:
+        """ヘッダーファイルの冒頭（コメント・マクロ定義・配列宣言）を生成"""
+        timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         memory_size = total_pixels * 2  # 16bit = 2 bytes per pixel
         
-        # ヘッダー部分
-        header_content = f"""// M5Unified用 RGB565画像データ
+        # PROGMEM指定（Arduinoでフラッシュメモリに格納）
+        progmem_attr = "PROGMEM " if use_progmem else ""
+        
+        # ヘッダー部分と配列宣言
+        return f"""// M5Unified用 RGB565画像データ
 // 自動生成日時: {timestamp}
 // 元ファイル: {input_filename}
 // 画像サイズ: {width}x{height} pixels
@@ -155,27 +469,37 @@ class M5ImageConverter:
 // M5Unified使用例:
 // M5.Display.drawRGBBitmap(x, y, {array_name}, {array_name.upper()}_WIDTH, {array_name.upper()}_HEIGHT);
 
+const uint16_t {progmem_attr}{array_name}[{total_pixels}] = {{
 """
+    
+    def _header_epilogue(self, array_name: str) -> str:
+        """ヘッダーファイルの末尾（配列の閉じ括弧とインクルードガード）を生成"""
+        return "};\n\n#endif // " + array_name.upper() + "_H\n"
+    
+    def _iter_data_lines(self, rgb565_data: np.ndarray, bytes_per_line: int):
+        """
+        データ配列の各行（"  0xXXXX, 0xXXXX, ...," と改行）を順に生成する
+        DATA_BLOCK_LINES 行ずつまとめて16進変換するので、出力全体の文字列は作らない
+        """
+        total_pixels = len(rgb565_data)
+        line_chars = bytes_per_line * 8
+        block_pixels = bytes_per_line * DATA_BLOCK_LINES
         
-        # PROGMEM指定（Arduinoでフラッシュメモリに格納）
-        progmem_attr = "PROGMEM " if use_progmem else ""
-        
-        # 配列宣言
-        header_content += f"const uint16_t {progmem_attr}{array_name}[{total_pixels}] = {{\n"
-        
-        # データ部分（見やすい形式で配置）
-        print("📝 Cコード生成中...")
-        for i in range(0, total_pixels, bytes_per_line):
-            line_data = rgb565_data[i:i + bytes_per_line]
-            hex_values = [f"0x{value:04X}" for value in line_data]
+        # ビッグエンディアンのバイト列にしておき、ブロックごとにC実装のhexlifyで16進文字列に変換
+        data_bytes = np.asarray(rgb565_data, dtype='>u2').tobytes()
+        for start in range(0, total_pixels, block_pixels):
+            end = min(start + block_pixels, total_pixels)
             
-            # 最後の行でない場合はカンマを追加
-            line_end = "," if i + bytes_per_line < total_pixels else ""
-            header_content += f"  {', '.join(hex_values)}{line_end}\n"
-        
-        header_content += "};\n\n#endif // " + array_name.upper() + "_H\n"
-        
-        return header_content
+            # 各値が "0xXXXX, " の8文字になる（データ全体の末尾の値だけ区切りなし）
+            hex_text = "0x" + binascii.hexlify(
+                data_bytes[start * 2:end * 2], ' ', 2
+            ).decode('ascii').upper().replace(' ', ', 0x')
+            if end < total_pixels:
+                hex_text += ", "
+            
+            # 1行分ずつ切り出す（末尾の空白を除くと行末のカンマが残り、最後の行はカンマなしになる）
+            for i in range(0, len(hex_text), line_chars):
+                yield "  " + hex_text[i:i + line_chars - 1] + "\n"
     
     def convert_image(self, input_path: str, output_path: Optional[str] = None,
                      array_name: Optional[str] = None, max_width: Optional[int] = None,
@@ -225,16 +549,21 @@ class M5ImageConverter:
             str(input_path), max_width, max_height, dithering
         )
         
-        # ヘッダーコンテンツ生成
-        header_content = self.generate_header_content(
-            rgb565_data, width, height, array_name, input_path.name,
-            use_progmem, bytes_per_line
-        )
-        
-        # ファイル書き出し
+        # ヘッダーコンテンツを生成しながらファイルに直接書き出し
         try:
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write(header_content)
+            # 大きな画像は出力サイズを確保したファイルにnumbaカーネルで直接書き込む
+            # （どちらの経路でも改行はLFにそろえる）
+            if width * height >= NUMBA_MIN_PIXELS and _jit(_write_hex_lines) is not None:
+                self.write_header_mmap(
+                    output_path, rgb565_data, width, height, array_name, input_path.name,
+                    use_progmem, bytes_per_line
+                )
+            else:
+                with open(output_path, 'w', encoding='utf-8', newline='\n') as f:
+                    self.write_header(
+                        f, rgb565_data, width, height, array_name, input_path.name,
+                        use_progmem, bytes_per_line
+                    )
             print(f"✅ 変換完了! → {output_path}")
             print(f"📊 配列名: {array_name}")
             print(f"📏 サイズ: {width}x{height}")